@@ -1,23 +1,471 @@
 import ee
-import geemap
 import os
 from datetime import datetime
 from pathlib import Path
 import logging
+import logging.handlers
+import atexit
+import functools
+import hashlib
+import itertools
+import multiprocessing
+import warnings
+import math
+import shutil
+import requests
+import asyncio
+import uuid
+import re
+from concurrent.futures import ThreadPoolExecutor
 
-#Change the following two lines from your GEE account:
-ee.Authenticate() #Will ask for your google earth engine credentials. Comment this line after running this once.
-ee.Initialize(project="ee-joshisur231") #instead of "ee.joshisur231" use your project name (top right corner of the GEE code editor)
+_logger = logging.getLogger(__name__)
 
-logging.basicConfig(filename='log/error.log', level=logging.ERROR)
+def _init_worker_logging(queue):
+    """
+    Sends the log records of a pool worker process to the queue drained by the parent process.
+    """
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(queue)]
+    root.setLevel(logging.ERROR)
+    # Records reach the queue through the root logger, don't also send them through the inherited module handler
+    _logger.handlers = []
+
+# Log records are pushed to a queue and written to the log file by a single listener thread,
+# so that parallel downloads don't contend on (or interleave lines in) the log file
+if multiprocessing.parent_process() is None:
+    _LOG_QUEUE = multiprocessing.Queue(-1)
+    _log_file_handler = logging.FileHandler('log/error.log')
+    # Same line format as logging.basicConfig
+    _log_file_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    _LOG_LISTENER = logging.handlers.QueueListener(_LOG_QUEUE, _log_file_handler)
+    _LOG_LISTENER.start()
+    atexit.register(_LOG_LISTENER.stop)
+    _logger.addHandler(logging.handlers.QueueHandler(_LOG_QUEUE))
+    _logger.setLevel(logging.ERROR)
+else:
+    _LOG_QUEUE = None
+
+# Default output names are "<prefix>_<session timestamp>_<counter>" so that calls within the same second don't overwrite each other
+_SESSION_STAMP = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+_COUNTER = itertools.count()
+
+# Largest collection download_image_collection(stack=True) is meant for
+STACK_MAX_IMAGES = 100
+
+# Earth Engine refuses getDownloadURL requests above 32 MB, keep some margin
+FAST_PATH_MAX_BYTES = 30 * 1024 * 1024
+# (connect, read) timeouts in seconds of fast path downloads, the read timeout applies between received chunks
+FAST_PATH_TIMEOUT = (30, 120)
+
+DEFAULT_ROI_ASSET = "projects/ee-joshisur231/assets/pa_effectiveness/nepal_boundary"
+_DEFAULT_ROI = None
+
+EE_PROJECT = "ee-joshisur231"
+HIGH_VOLUME_URL = "https://earthengine-highvolume.googleapis.com"
+_EE_READY = False
+
+def _ensure_ee():
+    """
+    Authenticates and initializes Earth Engine on first use rather than at import time.
+    """
+    global _EE_READY
+    if not _EE_READY:
+        #Change the following two lines from your GEE account:
+        ee.Authenticate() #Will ask for your google earth engine credentials. Comment this line after running this once.
+        ee.Initialize(project=EE_PROJECT) #instead of "ee.joshisur231" set EE_PROJECT to your project name (top right corner of the GEE code editor)
+        _EE_READY = True
+
+# Parameters shared by all the images of a download_image_collection call, set once per pool worker
+_WORKER_ARGS = None
+
+def _init_worker(queue, worker_args):
+    """
+    Initializer of the download_image_collection pool workers. Sets up logging, stores the parameters shared by
+    all the images (so the ROI is sent once per worker rather than with every image) and moves the worker to the
+    high-volume endpoint, meant for parallel automated downloads. The parent process (and with it the
+    interactive map) stays on the default endpoint.
+    """
+    global _EE_READY, _WORKER_ARGS
+    _init_worker_logging(queue)
+    _WORKER_ARGS = worker_args
+    if not _EE_READY:
+        ee.Authenticate()
+    ee.Initialize(project=EE_PROJECT, opt_url=HIGH_VOLUME_URL)
+    _EE_READY = True
+
+def _default_roi():
+    """
+    Returns the default ROI (Nepal Boundary) as a client-side ee.Geometry.
+    The geometry is fetched from Earth Engine only once and reused afterwards.
+    """
+    global _DEFAULT_ROI
+    if _DEFAULT_ROI is None:
+        _DEFAULT_ROI = ee.Geometry(ee.FeatureCollection(DEFAULT_ROI_ASSET).geometry().getInfo())
+    return _DEFAULT_ROI
+
+def _resolve_roi(roi):
+    """
+    Materializes the ROI into a client-side ee.Geometry, so it is sent to Earth Engine as plain coordinates
+    rather than as a computation to be re-evaluated for every image. Defaults to Nepal Boundary if None.
+    """
+    if roi is None:
+        return _default_roi()
+    if isinstance(roi, ee.FeatureCollection):
+        return ee.Geometry(roi.geometry().getInfo())
+    if isinstance(roi, ee.Geometry) and roi.func is not None:
+        return ee.Geometry(roi.getInfo())
+    return roi
+
+# Native scale (in meters) of well-known products, keyed by asset address prefix
+_NATIVE_SCALES = {
+    "COPERNICUS/S2": 10.0,
+    "LANDSAT/LC08": 30.0,
+    "LANDSAT/LC09": 30.0,
+    "LANDSAT/LE07": 30.0,
+    "LANDSAT/LT05": 30.0,
+    "MODIS/061/MOD13Q1": 231.65635826395828,
+    "MODIS/061/MOD13A1": 463.3127165279165,
+    "USGS/SRTMGL1_003": 30.922080775909325,
+}
+
+def _scale_for(asset_address):
+    """
+    Returns the native scale of a well-known product without querying Earth Engine, or None if the product is unknown.
+    """
+    for prefix, scale in _NATIVE_SCALES.items():
+        if asset_address.startswith(prefix):
+            return scale
+    return None
+
+@functools.lru_cache(maxsize=256)
+def _resolve_scale(asset_address: str) -> float:
+    """
+    Returns the nominal scale (in meters) of an image asset. Results are cached per asset address.
+    """
+    return ee.Image(asset_address).projection().nominalScale().getInfo()
+
+@functools.lru_cache(maxsize=1024)
+def _parse_asset(asset_address):
+    """
+    Returns the asset address as a string along with its prefix (first path component), used to name default outputs.
+    """
+    asset_address = str(asset_address)
+    return asset_address, asset_address.split("/", 1)[0]
+
+def _resolve_output(output_path, prefix, ext, name=None, is_dir=False):
+    """
+    Returns the output path, defaulting to "<prefix>_<name><ext>" in the Downloads directory, and creates its parent directory
+    (or the output directory itself if is_dir is True). The name defaults to the session timestamp followed by a counter.
+    """
+    if output_path is None:
+        if name is None:
+            name = f"{_SESSION_STAMP}_{next(_COUNTER):05d}"
+        output_path = str(Path.home() / "Downloads" / f"{prefix}_{name}{ext}")
+    directory = Path(output_path) if is_dir else Path(output_path).parent
+    directory.mkdir(parents=True, exist_ok=True)
+    return output_path
+
+# geemap options that don't change the downloaded image, left out of the cache key
+_UNCACHED_OPTIONS = {"overwrite", "num_threads", "max_tile_size", "max_tile_dim"}
+
+def _cache_key(*args, **kwargs):
+    """
+    Returns a short stable hash of the download parameters, used to name default outputs so that
+    repeated downloads of the same asset can be skipped.
+    """
+    options = sorted((k, v) for k, v in kwargs.items() if k not in _UNCACHED_OPTIONS)
+    return hashlib.blake2b(repr((args, options)).encode(), digest_size=8).hexdigest()
+
+def _to_cog(path):
+    """
+    Rewrites a downloaded GeoTIFF in place as a Cloud Optimized GeoTIFF (256x256 DEFLATE tiles with overviews).
+    Uses the floating point predictor for float data and the horizontal differencing one otherwise.
+
+    Note:
+    - Requires rio-cogeo, the file is left as downloaded if it is not installed.
+    """
+    try:
+        import rasterio
+        from rio_cogeo.cogeo import cog_translate
+        from rio_cogeo.profiles import cog_profiles
+    except ImportError:
+        warnings.warn("rio-cogeo is not installed, skipping COG conversion")
+        return
+
+    with rasterio.open(path) as src:
+        is_float = src.dtypes[0].startswith("float")
+
+    profile = cog_profiles.get("deflate")
+    profile.update(blockxsize=256, blockysize=256, predictor=3 if is_float else 2)
+
+    cog_path = f"{path}.cog.tif"
+    cog_translate(path, cog_path, profile, quiet=True)
+    os.replace(cog_path, path)
+
+def _tile_grid(roi, spatial_resolution, tile_size_px):
+    """
+    Splits the bounding box of the ROI into a grid of non-overlapping tiles of at most tile_size_px x tile_size_px pixels,
+    all on the same EPSG:4326 pixel grid so they can be mosaicked without resampling.
+    Returns a list of (row, column, crs_transform, (height, width)) tuples.
+    """
+    coords = roi.bounds().getInfo()["coordinates"][0]
+    xmin, ymin = min(c[0] for c in coords), min(c[1] for c in coords)
+    xmax, ymax = max(c[0] for c in coords), max(c[1] for c in coords)
+
+    # Approximate size of a pixel in degrees (1 degree ~ 111.32 km)
+    pixel_deg = spatial_resolution / 111320
+    width = max(1, math.ceil((xmax - xmin) / pixel_deg))
+    height = max(1, math.ceil((ymax - ymin) / pixel_deg))
+
+    tiles = []
+    for i, row_off in enumerate(range(0, height, tile_size_px)):
+        for j, col_off in enumerate(range(0, width, tile_size_px)):
+            crs_transform = [pixel_deg, 0, xmin + col_off * pixel_deg, 0, -pixel_deg, ymax - row_off * pixel_deg]
+            shape = (min(tile_size_px, height - row_off), min(tile_size_px, width - col_off))
+            tiles.append((i, j, crs_transform, shape))
+    return tiles
+
+def _download_tiles(image, output_path, roi, spatial_resolution, tile_size_px, tile_threads, **kwargs):
+    """
+    Downloads the image tile by tile in parallel into a "<output name>_tiles" directory next to output_path.
+    Tiles are downloaded on a shared EPSG:4326 grid, any crs, crs_transform or shape in kwargs is ignored.
+    Returns the list of tile paths.
+    """
+    import geemap
+
+    for key in ("crs", "crs_transform", "shape"):
+        kwargs.pop(key, None)
+
+    tiles_dir = os.path.splitext(output_path)[0] + "_tiles"
+    Path(tiles_dir).mkdir(parents=True, exist_ok=True)
+
+    tile_paths = []
+    with ThreadPoolExecutor(max_workers=tile_threads) as executor:
+        futures = []
+        for i, j, crs_transform, shape in _tile_grid(roi, spatial_resolution, tile_size_px):
+            tile_path = os.path.join(tiles_dir, f"tile_{i:04d}_{j:04d}.tif")
+            tile_paths.append(tile_path)
+            futures.append(executor.submit(
+                geemap.download_ee_image,
+                image = image,
+                filename = tile_path,
+                crs = "EPSG:4326",
+                crs_transform = crs_transform,
+                shape = shape,
+                **kwargs
+                ))
+        for future in futures:
+            future.result()
+
+    return tile_paths
+
+async def _poll(task, interval=10):
+    """
+    Waits for an Earth Engine batch task to finish, checking its status every interval seconds.
+    """
+    while True:
+        status = await asyncio.to_thread(task.status)
+        if status["state"] == "COMPLETED":
+            return status
+        if status["state"] in ("FAILED", "CANCELLED"):
+            raise RuntimeError(f"Export task {status['description']} {status['state'].lower()}: {status.get('error_message')}")
+        await asyncio.sleep(interval)
+
+async def _poll_all(tasks):
+    return await asyncio.gather(*[_poll(task) for task in tasks])
+
+def _wait_for_tasks(tasks):
+    """
+    Waits for all the tasks to finish. Runs the event loop in a separate thread when one is already
+    running (e.g. in a Jupyter notebook).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_poll_all(tasks))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _poll_all(tasks)).result()
+
+def _export_tiles(image, output_path, roi, spatial_resolution, tile_size_px, tile_threads, gcs_bucket):
+    """
+    Exports the image tile by tile to Cloud Storage with Earth Engine batch tasks running in parallel,
+    then downloads the exported files into a "<output name>_tiles" directory next to output_path.
+    Returns the list of tile paths.
+
+    Note:
+    - Requires google-cloud-storage
+    """
+    from google.cloud import storage
+
+    stem = os.path.splitext(os.path.basename(output_path))[0]
+    tiles_dir = os.path.splitext(output_path)[0] + "_tiles"
+    Path(tiles_dir).mkdir(parents=True, exist_ok=True)
+
+    # Unique per run, so that files left by earlier exports are never picked up
+    run_prefix = f"{stem}_{uuid.uuid4().hex}"
+    # Task descriptions are limited to 100 characters out of [A-Za-z0-9.,:;_-], leave room for the "_tile_iiii_jjjj" suffix
+    task_stem = re.sub(r"[^A-Za-z0-9.,:;_-]", "_", stem)[:85]
+    bucket = storage.Client().bucket(gcs_bucket)
+
+    tasks = []
+    try:
+        for i, j, crs_transform, (height, width) in _tile_grid(roi, spatial_resolution, tile_size_px):
+            task = ee.batch.Export.image.toCloudStorage(
+                image = image,
+                description = f"{task_stem}_tile_{i:04d}_{j:04d}",
+                bucket = gcs_bucket,
+                fileNamePrefix = f"{run_prefix}/tile_{i:04d}_{j:04d}",
+                crs = "EPSG:4326",
+                crsTransform = crs_transform,
+                dimensions = f"{width}x{height}",
+                maxPixels = 1e13,
+                )
+            task.start()
+            tasks.append(task)
+
+        _wait_for_tasks(tasks)
+    except BaseException:
+        # Don't leave the other exports running on Earth Engine
+        for task in tasks:
+            if task.active():
+                task.cancel()
+        # Remove the tiles of the exports that did complete
+        for blob in bucket.list_blobs(prefix=f"{run_prefix}/"):
+            blob.delete()
+        raise
+
+    # Large tiles may be split by Earth Engine into several files sharing the same prefix
+    blobs = list(bucket.list_blobs(prefix=f"{run_prefix}/"))
+    tile_paths = [os.path.join(tiles_dir, os.path.basename(blob.name)) for blob in blobs]
+    try:
+        with ThreadPoolExecutor(max_workers=tile_threads) as executor:
+            list(executor.map(lambda blob, path: blob.download_to_filename(path), blobs, tile_paths))
+    finally:
+        with ThreadPoolExecutor(max_workers=tile_threads) as executor:
+            list(executor.map(lambda blob: blob.delete(), blobs))
+
+    return tile_paths
+
+def _merge_tiles(tile_paths, output_path):
+    """
+    Mosaics the downloaded tiles into a single tiled GeoTIFF at output_path.
+    Tiles are copied block by block, so memory use does not grow with the size of the mosaic, and blocks without
+    any valid pixel are skipped.
+
+    Note:
+    - Requires rasterio
+    """
+    import rasterio
+    from rasterio.transform import from_origin
+    from rasterio.windows import Window
+
+    with rasterio.open(tile_paths[0]) as src:
+        profile = src.profile
+        xres, yres = src.res
+
+    bounds = []
+    for path in tile_paths:
+        with rasterio.open(path) as src:
+            bounds.append(src.bounds)
+    left = min(b.left for b in bounds)
+    top = max(b.top for b in bounds)
+
+    # Pixel offset of every tile in the mosaic
+    offsets = [(round((b.left - left) / xres), round((top - b.top) / yres)) for b in bounds]
+    width = max(col_off + round((b.right - b.left) / xres) for (col_off, _), b in zip(offsets, bounds))
+    height = max(row_off + round((b.top - b.bottom) / yres) for (_, row_off), b in zip(offsets, bounds))
+
+    profile.update(
+        height=height,
+        width=width,
+        transform=from_origin(left, top, xres, yres),
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+        compress="deflate",
+        )
+
+    # Keep GDAL's block cache small so written blocks are flushed instead of piling up in memory
+    with rasterio.Env(GDAL_CACHEMAX=64):
+        with rasterio.open(output_path, "w", **profile) as dst:
+            for path, (col_off, row_off) in zip(tile_paths, offsets):
+                with rasterio.open(path) as src:
+                    for _, window in src.block_windows():
+                        data = src.read(window=window, masked=True)
+                        # Tiles don't overlap, blocks without any valid pixel can be left as nodata
+                        if data.mask.all():
+                            continue
+                        dst.write(
+                            data.data,
+                            window=Window(col_off + window.col_off, row_off + window.row_off, window.width, window.height)
+                            )
+
+def _build_vrt(tile_paths, output_path):
+    """
+    Builds a VRT index over the downloaded tiles at output_path. Tiles are referenced relative to the VRT,
+    so the VRT and its tiles directory can be moved together.
+
+    Note:
+    - Requires GDAL python bindings
+    """
+    from osgeo import gdal
+
+    vrt = gdal.BuildVRT(output_path, sorted(tile_paths), options=gdal.BuildVRTOptions(resolution="highest"))
+    vrt.FlushCache()
+    vrt = None
+
+    vrt_dir = os.path.dirname(os.path.abspath(output_path))
+    with open(output_path) as f:
+        content = f.read()
+    for tile_path in tile_paths:
+        content = content.replace(
+            f'relativeToVRT="0">{tile_path}<',
+            f'relativeToVRT="1">{os.path.relpath(os.path.abspath(tile_path), vrt_dir)}<'
+            )
+    with open(output_path, "w") as f:
+        f.write(content)
+
+def _estimate_size(image, roi, spatial_resolution):
+    """
+    Estimates the size in bytes of the image over the bounding box of the ROI (the extent getDownloadURL returns),
+    assuming 8 bytes per pixel per band.
+    """
+    info = ee.Dictionary({
+        "area": roi.bounds(maxError=1).area(maxError=1),
+        "bands": image.bandNames().size(),
+        }).getInfo()
+    return info["area"] / spatial_resolution ** 2 * info["bands"] * 8
+
+def _download_url(image, output_path, roi, spatial_resolution, crs=None):
+    """
+    Downloads a small image directly through getDownloadURL, streaming the response to output_path.
+    """
+    url = image.getDownloadURL({
+        "scale": spatial_resolution,
+        "region": roi,
+        "format": "GEO_TIFF",
+        "crs": crs or "EPSG:4326",
+        })
+    with requests.get(url, stream=True, timeout=FAST_PATH_TIMEOUT) as r:
+        r.raise_for_status()
+        with open(output_path, "wb") as f:
+            shutil.copyfileobj(r.raw, f)
 
 def download_image(
         image_asset_address, 
         clip=True, 
-        roi=ee.FeatureCollection("projects/ee-joshisur231/assets/pa_effectiveness/nepal_boundary").geometry(), 
+        roi=None, 
         output_path=None,
         mosaic_collection = False,
         spatial_resolution = None,
+        cog = False,
+        tile = False,
+        tile_size_px = 2048,
+        tile_threads = 16,
+        keep_tiles = False,
+        fast_path = False,
+        async_export = False,
+        gcs_bucket = None,
         **kwargs
         ):
     """
@@ -25,10 +473,18 @@ def download_image(
 
     Parameters:
     - image_asset_address (str): A link to the image in Earth Engine.
-    - roi (ee.FeatureCollection): A region of interest (ROI) specified as an Earth Engine FeatureCollection. Defaults to Nepal Boundary.
-    - output_path (str): The file path to save the downloaded GeoTIFF image.
+    - roi (ee.FeatureCollection): A region of interest (ROI) specified as an Earth Engine FeatureCollection. Defaults to Nepal Boundary if None.
+    - output_path (str): The file path to save the downloaded GeoTIFF image. If None, downloads to the Downloads directory under a name derived from the asset and download parameters, and an existing download with the same parameters is reused unless overwrite=True. If it ends with ".vrt" the image is downloaded in tiles and a VRT index over the tiles is written instead of a single GeoTIFF.
     - mosaic_collection (bool, optional): In case the there are multiple tiles in the image. Default is False.
     - clip (bool, optional): Whether to clip the image to the specified ROI. Default is True.
+    - cog (bool, optional): Whether to rewrite the downloaded image as a Cloud Optimized GeoTIFF. Not needed with tile, the mosaic is already written tiled and compressed. Default is False.
+    - tile (bool, optional): Whether to split the ROI into tiles downloaded in parallel and mosaicked locally. Useful for large ROIs. Tiles are downloaded in EPSG:4326. Default is False.
+    - tile_size_px (int, optional): Approximate size of a tile in pixels when tile is True. Default is 2048.
+    - tile_threads (int, optional): Number of tiles downloaded in parallel when tile is True. Default is 16.
+    - keep_tiles (bool, optional): Whether to keep the individual tiles after mosaicking. Default is False.
+    - async_export (bool, optional): Whether to export the image tiles to Cloud Storage with Earth Engine batch tasks running in parallel and download them from there, instead of downloading them directly. Useful for very large ROIs, the tiles are then handled as with tile. The optional geemap parameters below are ignored. Default is False.
+    - gcs_bucket (str, optional): Cloud Storage bucket used when async_export is True.
+    - fast_path (bool, optional): Whether to download small images (under 30 MB) directly with getDownloadURL instead of geemap. The optional geemap parameters below are ignored when this path is taken. Default is False.
     - Optional parameters that can be passed if required (refer to geemap documentation for details): 
         -resampling = "near", (use 'bilinear', 'bicubic' for soomothing continous data)
         -dtype = None,
@@ -42,45 +498,210 @@ def download_image(
         -crs = None,
         -crs_transform = None,
 
+    Returns:
+    - The path of the downloaded image.
+
     Note:
-    - Required packages: geemap, geedim and earth-engine
+    - Required packages: geemap, geedim and earth-engine, requires rio-cogeo for cog and rasterio for tile, GDAL for VRT output, google-cloud-storage for async_export
     """
+    import geemap
+
+    _ensure_ee()
+    part_path = None
     try:
-        image_asset_address = str(image_asset_address)
-        image_prefix = image_asset_address.split("/")[0]
+        roi = _resolve_roi(roi)
+
+        image_asset_address, image_prefix = _parse_asset(image_asset_address)
         
         if mosaic_collection:
             image_collection = ee.ImageCollection(image_asset_address)
-            spatial_resolution = image_collection.first().projection().nominalScale()
+            spatial_resolution = _scale_for(image_asset_address) or image_collection.first().projection().nominalScale().getInfo()
             crs = "EPSG:4326"
             image = image_collection.mosaic()
 
         else:
             image = ee.Image(image_asset_address)
-            spatial_resolution = image.projection().nominalScale().getInfo()
+            spatial_resolution = _scale_for(image_asset_address) or _resolve_scale(image_asset_address)
             crs = None
         
         if clip:
             image = image.clip(roi)
 
-        if output_path is None:
-            downloads_dir = str(Path.home() / "Downloads")
-            output_path = os.path.join(downloads_dir, f"{image_prefix}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.tif")
+        if async_export and gcs_bucket is None:
+            raise ValueError("gcs_bucket is required when async_export is True")
+
+        key = None if output_path else _cache_key(
+            image_asset_address, mosaic_collection, clip, roi.toGeoJSON(), spatial_resolution, crs,
+            cog=cog, tile=tile, fast_path=fast_path, async_export=async_export, **kwargs
+            )
+        output_path = _resolve_output(output_path, image_prefix, ".tif", key)
+        if key and os.path.exists(output_path) and os.path.getsize(output_path) > 0 and not kwargs.get("overwrite"):
+            return output_path
+        # The download goes to a temporary file, so geemap can't check this itself
+        if not kwargs.get("overwrite", True) and os.path.exists(output_path):
+            raise FileExistsError(f"{output_path} exists and overwrite is False")
+
+        vrt = output_path.endswith(".vrt")
+
+        # Write to a temporary file first, so an interrupted download never leaves a partial file at output_path
+        root, ext = os.path.splitext(output_path)
+        part_path = f"{root}.part{ext}"
+
+        if async_export or tile or vrt:
+            if async_export:
+                tile_paths = _export_tiles(image, output_path, roi, spatial_resolution, tile_size_px, tile_threads, gcs_bucket)
+            else:
+                tile_paths = _download_tiles(image, output_path, roi, spatial_resolution, tile_size_px, tile_threads, **kwargs)
+            if vrt:
+                _build_vrt(tile_paths, part_path)
+            else:
+                _merge_tiles(tile_paths, part_path)
+                if not keep_tiles:
+                    shutil.rmtree(os.path.dirname(tile_paths[0]))
+        elif fast_path and _estimate_size(image, roi, spatial_resolution) < FAST_PATH_MAX_BYTES:
+            _download_url(image, part_path, roi, spatial_resolution, crs)
         else:
-            output_dir = os.path.dirname(output_path)
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            geemap.download_ee_image(
+                image = image,
+                filename = part_path,
+                region = roi,
+                crs=crs,
+                scale = spatial_resolution,
+                **kwargs
+                )
+
+        # Tiled mosaics are already written as tiled DEFLATE GeoTIFFs
+        if cog and not (vrt or tile or async_export):
+            _to_cog(part_path)
+
+        os.replace(part_path, output_path)
+        return output_path
+    except Exception as e:
+        if part_path and os.path.exists(part_path):
+            os.remove(part_path)
+        _logger.error(f"Error: ({datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}): {e} for asset {image_asset_address}")
+        raise e
+
+def download_image_as_array(
+        image_asset_address,
+        roi=None,
+        spatial_resolution=None,
+        clip=True,
+        ):
+    """
+    Fetches an image from Earth Engine over a region of interest (ROI) directly as a NumPy array, without writing a GeoTIFF.
+
+    Parameters:
+    - image_asset_address (str): A link to the image in Earth Engine.
+    - roi (ee.FeatureCollection): A region of interest (ROI) specified as an Earth Engine FeatureCollection. Defaults to Nepal Boundary if None.
+    - spatial_resolution (float, optional): Pixel size in meters. Defaults to the native scale of the image.
+    - clip (bool, optional): Whether to clip the image to the specified ROI. Default is True.
+
+    Returns:
+    - numpy structured array of shape (rows, columns) with one field per band, on an EPSG:4326 grid covering the ROI bounds.
+
+    Note:
+    - Required packages: earth-engine and numpy
+    - Earth Engine limits a single request to 48 MB, use download_image with tile=True for larger images.
+    """
+    _ensure_ee()
+    try:
+        roi = _resolve_roi(roi)
+        image_asset_address, _ = _parse_asset(image_asset_address)
+
+        image = ee.Image(image_asset_address)
+        if spatial_resolution is None:
+            spatial_resolution = _scale_for(image_asset_address) or _resolve_scale(image_asset_address)
+        if clip:
+            image = image.clip(roi)
 
-        return geemap.download_ee_image(
+        coords = roi.bounds().getInfo()["coordinates"][0]
+        xmin, ymin = min(c[0] for c in coords), min(c[1] for c in coords)
+        xmax, ymax = max(c[0] for c in coords), max(c[1] for c in coords)
+
+        # Pixel size in degrees (1 degree ~ 111.32 km)
+        pixel_deg = spatial_resolution / 111320
+
+        return ee.data.computePixels({
+            "expression": image,
+            "fileFormat": "NUMPY_NDARRAY",
+            "grid": {
+                "dimensions": {
+                    "width": max(1, math.ceil((xmax - xmin) / pixel_deg)),
+                    "height": max(1, math.ceil((ymax - ymin) / pixel_deg)),
+                    },
+                "affineTransform": {
+                    "scaleX": pixel_deg,
+                    "shearX": 0,
+                    "translateX": xmin,
+                    "shearY": 0,
+                    "scaleY": -pixel_deg,
+                    "translateY": ymax,
+                    },
+                "crsCode": "EPSG:4326",
+                },
+            })
+    except Exception as e:
+        _logger.error(f"Error: ({datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}): {e} for asset {image_asset_address}")
+        raise e
+
+def _collection_filename(output_path, filenames, idx, image_id):
+    """
+    Returns the output file of the idx-th image of a collection, named after filenames[idx] if given, else the image ID.
+    """
+    filename = filenames[idx] if filenames else image_id
+    if not filename.endswith(".tif"):
+        filename = f"{filename}.tif"
+    return os.path.join(output_path, filename)
+
+def _split_stack(stack_path, output_path, filenames, image_ids):
+    """
+    Splits a GeoTIFF downloaded from ImageCollection.toBands() back into one GeoTIFF per image.
+    Assumes every image of the collection has the same bands.
+
+    Note:
+    - Requires rasterio
+    """
+    import rasterio
+
+    with rasterio.open(stack_path) as src:
+        bands_per_image = src.count // len(image_ids)
+        profile = src.profile
+        profile.update(count=bands_per_image)
+        for idx, image_id in enumerate(image_ids):
+            indexes = list(range(idx * bands_per_image + 1, (idx + 1) * bands_per_image + 1))
+            with rasterio.open(_collection_filename(output_path, filenames, idx, image_id), "w", **profile) as dst:
+                dst.write(src.read(indexes))
+                dst.descriptions = tuple(
+                    # toBands() names bands "<image id>_<band name>"
+                    (src.descriptions[i - 1] or "").removeprefix(f"{image_id}_") or None
+                    for i in indexes
+                    )
+
+def _fetch(idx, image_id):
+    """
+    Worker for download_image_collection. Downloads a single image of the collection, using the parameters
+    set by _init_worker. Kept at module level so it can be pickled by multiprocessing.
+    """
+    import geemap
+
+    collection_asset_address, roi, spatial_resolution, clip, output_path, filenames, kwargs = _WORKER_ARGS
+    try:
+        image = ee.Image(f"{collection_asset_address}/{image_id}")
+        if clip:
+            image = image.clip(roi)
+
+        filename = _collection_filename(output_path, filenames, idx, image_id)
+        geemap.download_ee_image(
             image = image,
-            filename = output_path,
+            filename = filename,
             region = roi,
-            crs=crs,
             scale = spatial_resolution,
             **kwargs
             )
+        return filename
     except Exception as e:
-        logging.error(f"Error: ({datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}): {e} for asset {image_asset_address}")
+        _logger.error(f"Error: ({datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}): {e} for asset {collection_asset_address}/{image_id}")
         raise e
 
 def download_image_collection(
@@ -88,9 +709,11 @@ def download_image_collection(
         start_date, 
         end_date, 
         output_path=None, 
-        roi=ee.FeatureCollection("projects/ee-joshisur231/assets/pa_effectiveness/nepal_boundary").geometry(), 
+        roi=None, 
         clip=True,
         mosaic = False,
+        num_processes = 25,
+        stack = False,
         **kwargs
         ):
     """
@@ -101,8 +724,11 @@ def download_image_collection(
     - start_date (str): Start date in 'YYYY-MM-DD' format.
     - end_date (str): End date in 'YYYY-MM-DD' format.
     - output_path (str, optional): The file path to save the downloaded GeoTIFF image. If None, downloads to the Downloads directory.
-    - roi (ee.FeatureCollection, optional): A region of interest (ROI) specified as an Earth Engine FeatureCollection. Defaults to Nepal Boundary.
+    - roi (ee.FeatureCollection, optional): A region of interest (ROI) specified as an Earth Engine FeatureCollection. Defaults to Nepal Boundary if None.
     - clip (bool, optional): Whether to clip the image to the specified ROI. Default is True.
+    - mosaic (bool, optional): Whether to mosaic the images into a single GeoTIFF (output_path is then a file path) instead of downloading one GeoTIFF per image. Default is False.
+    - num_processes (int, optional): Number of images downloaded in parallel. Default is 25.
+    - stack (bool, optional): Whether to download the whole collection as a single multiband image (clipped once) and split it locally into per-image files. Meant for small collections (up to about 100 images, a warning is issued above that) of images sharing the same bands and projection. Default is False.
     - Optional parameters that can be passed if required (refer to geemap documentation for details): 
         -resampling = "near" (use 'bilinear', 'bicubic' for soomothing continous data),
         -dtype = None,
@@ -116,47 +742,95 @@ def download_image_collection(
         -filenames = None,
         -crs = None,
         -crs_transform = None,
+
+    Returns:
+    - The list of paths of the downloaded images, or the path of the mosaic if mosaic is True.
+
     Note:
-    - Required packages: geemap, geedim and earth-engine
+    - Required packages: geemap, geedim and earth-engine, requires rasterio for stack
     """
-    def clip(image):
-        return image.clip(roi)
+    _ensure_ee()
     try:
-        image_prefix = collection_asset_address.split("/")[0]
-        
-        collection_asset_address = str(collection_asset_address)
+        roi = _resolve_roi(roi)
+
+        collection_asset_address, image_prefix = _parse_asset(collection_asset_address)
         
         image_collection = ee.ImageCollection(collection_asset_address)\
             .filterBounds(roi)\
             .filterDate(start_date, end_date)
         
-        spatial_resolution = image_collection.first().projection().nominalScale().getInfo()
+        # Fetch all the metadata needed client-side in a single request
+        count = image_collection.size()
+        spatial_resolution = _scale_for(collection_asset_address)
+        meta = ee.Dictionary({
+            "count": count,
+            "ids": image_collection.aggregate_array("system:index"),
+            "scale": spatial_resolution or ee.Algorithms.If(count.gt(0), image_collection.first().projection().nominalScale(), None),
+            }).getInfo()
+        if meta["count"] == 0:
+            raise ValueError(f"No images found between {start_date} and {end_date} for the given ROI")
+        image_ids = meta["ids"]
+        spatial_resolution = meta["scale"]
 
-        if clip:
-            image_collection = image_collection.map(clip)
+        if mosaic:
+            import geemap
 
-        if output_path is None:
-            downloads_dir = str(Path.home() / "Downloads")
-            output_path = os.path.join(downloads_dir, f"{image_prefix}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}")
-        else:
-            output_dir = os.path.dirname(output_path)
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            # Mosaic first so the ROI is intersected once rather than once per image
+            image = image_collection.mosaic()
+            if clip:
+                image = image.clip(roi)
+            kwargs.pop("filenames", None)
+            # A mosaic has no fixed projection, geedim needs an explicit crs to download it
+            kwargs.setdefault("crs", "EPSG:4326")
+            output_path = _resolve_output(output_path, image_prefix, ".tif")
+            geemap.download_ee_image(
+                image = image,
+                filename = output_path,
+                region = roi,
+                scale = spatial_resolution,
+                **kwargs
+                )
+            return output_path
 
-        return geemap.download_ee_image_collection(
-            collection = image_collection,
-            out_dir = output_path,
-            region = roi,
-            scale = spatial_resolution,
-            **kwargs
-            )
+        output_path = _resolve_output(output_path, image_prefix, "", is_dir=True)
+
+        filenames = kwargs.pop("filenames", None)
+
+        if stack:
+            import geemap
+
+            if len(image_ids) > STACK_MAX_IMAGES:
+                warnings.warn(f"stack is meant for small collections, stacking {len(image_ids)} images (more than {STACK_MAX_IMAGES}) may be slow or fail")
+
+            stacked = image_collection.toBands()
+            if clip:
+                stacked = stacked.clip(roi)
+            stack_path = os.path.join(output_path, f"{image_prefix}_stack.tif")
+            geemap.download_ee_image(
+                image = stacked,
+                filename = stack_path,
+                region = roi,
+                scale = spatial_resolution,
+                **kwargs
+                )
+            try:
+                _split_stack(stack_path, output_path, filenames, image_ids)
+            finally:
+                os.remove(stack_path)
+            return [_collection_filename(output_path, filenames, idx, image_id) for idx, image_id in enumerate(image_ids)]
+
+        worker_args = (collection_asset_address, roi, spatial_resolution, clip, output_path, filenames, kwargs)
     except Exception as e:
-        logging.error(f"Error: ({datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}): {e} for asset {collection_asset_address}")
+        _logger.error(f"Error: ({datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}): {e} for asset {collection_asset_address}")
         raise e
 
+    # Errors of the workers are logged by _fetch, with the ID of the failing image
+    with multiprocessing.Pool(min(num_processes, len(image_ids)), initializer=_init_worker, initargs=(_LOG_QUEUE, worker_args)) as pool:
+        return pool.starmap(_fetch, enumerate(image_ids))
+
 def download_vector(
         vector_asset_address, 
-        roi=ee.FeatureCollection("projects/ee-joshisur231/assets/pa_effectiveness/nepal_boundary").geometry(), 
+        roi=None, 
         output_path=None,
         **kwargs
         ):
@@ -165,7 +839,7 @@ def download_vector(
 
     Parameters:
     - image_asset_address (str): A link to the image in Earth Engine.
-    - roi (ee.FeatureCollection): A region of interest (ROI) specified as an Earth Engine FeatureCollection. Defaults to Nepal Boundary.
+    - roi (ee.FeatureCollection): A region of interest (ROI) specified as an Earth Engine FeatureCollection. Defaults to Nepal Boundary if None.
     - output_path (str): The file path to save the downloaded GeoTIFF image.
     - mosaic_collection (bool, optional): In case the there are multiple tiles in the image. Default is False.
     - clip (bool, optional): Whether to clip the image to the specified ROI. Default is True.
@@ -185,26 +859,24 @@ def download_vector(
     Note:
     - Required packages: geemap, geedim and earth-engine
     """
+    import geemap
+
+    _ensure_ee()
     try:
-        vector_asset_address = str(vector_asset_address)
-        vector_prefix = vector_asset_address.split("/")[0]
+        roi = _resolve_roi(roi)
+
+        vector_asset_address, vector_prefix = _parse_asset(vector_asset_address)
         vector = ee.FeatureCollection(vector_asset_address)\
             .filterBounds(roi)
         
-        if output_path is None:
-            downloads_dir = str(Path.home() / "Downloads")
-            output_path = os.path.join(downloads_dir, f"{vector_prefix}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.shp")
-        else:
-            output_dir = os.path.dirname(output_path)
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+        output_path = _resolve_output(output_path, vector_prefix, ".shp")
 
         return geemap.ee_export_vector(
             ee_object = vector,
             filename=output_path
         )
     except Exception as e:
-        logging.error(f"Error: ({datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}): {e} for asset {vector_asset_address}")
+        _logger.error(f"Error: ({datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}): {e} for asset {vector_asset_address}")
         raise e
 
 def add_image_to_map(image_path = None, image_asset_address = None, layer_name = None, **kwargs):
@@ -212,18 +884,31 @@ def add_image_to_map(image_path = None, image_asset_address = None, layer_name =
     Adds Earth Engine assests vector/images and local rasters to an interactive map.
 
     Parameters:
-    - image_path (str): Path to the local image. Defaults to None.
+    - image_path (str or list): Path to the local image, or list of paths to add several local images. Defaults to None.
     - image_assest_address (str): A link to the image in Earth Engine. Defaults to None.
-    - layer_name (str): Name for the layer
+    - layer_name (str or list): Name for the layer, or list of names for the images in image_path (missing names default to None).
     Note:
     - Required packages: geemap, geedim and earth-engine, requires xarray for local image
     """
+    import geemap
+
+    _ensure_ee()
     Map = geemap.Map()
 
     if image_path:
-        Map.add_raster(source = image_path, layer_name = layer_name, **kwargs)
+        if isinstance(image_path, (str, os.PathLike)):
+            image_path = [image_path]
+        if layer_name is None or isinstance(layer_name, str):
+            layer_names = [layer_name]
+        else:
+            layer_names = list(layer_name)
+        if len(layer_names) > len(image_path):
+            raise ValueError(f"Got {len(layer_names)} layer names for {len(image_path)} images")
+        layer_names += [None] * (len(image_path) - len(layer_names))
+
+        for path, name in zip(image_path, layer_names):
+            Map.add_raster(source = path, layer_name = name, **kwargs)
     
     if image_asset_address:
-        Map.addLayer(ee_object = ee.Image(image_asset_address), name = layer_name, **kwargs)
+        Map.addLayer(ee_object = ee.Image(image_asset_address), name = layer_name if isinstance(layer_name, str) else None, **kwargs)
     return Map
-    
\ No newline at end of file